@@ -3,21 +3,31 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
+import hashlib
 import logging
 import os
 import time
-from dataclasses import dataclass
+from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
 
-import requests
+import orjson
 
-ROOT = Path(__file__).resolve().parents[1]
+if TYPE_CHECKING:
+    import aiohttp
+
+# Plain dirname arithmetic; .resolve() would stat/readlink the whole chain
+# on every cold import and symlinked checkouts aren't a layout we support.
+ROOT = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 DATA_FILE = ROOT / "data" / "prices.json"
+DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
 CONFIG_FILE = Path(__file__).with_name("config.json")
 CONFIG_EXAMPLE_FILE = Path(__file__).with_name("config.example.json")
+CACHE_FILE = ROOT / ".cache" / "responses.json"
 
 USER_AGENT = (
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -25,11 +35,31 @@ USER_AGENT = (
     "Chrome/123.0.0.0 Safari/537.36"
 )
 
+REQUEST_TIMEOUT = 20
+
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Serve cached bodies without revalidating for 30 minutes; beyond that,
+# revalidate with If-None-Match/If-Modified-Since so a 304 skips the body.
+CACHE_TTL = 1800
+
+_RESPONSE_CACHE: Dict[str, Dict[str, Any]] = {}
+
+# At most this many requests in flight per retailer host; unbounded fan-out
+# draws 429s and host blocks, which cost far more than the queueing.
+HOST_CONCURRENCY = 4
+
+_HOST_SEMAPHORES: Dict[str, asyncio.Semaphore] = defaultdict(
+    lambda: asyncio.Semaphore(HOST_CONCURRENCY)
+)
+
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger("solo-scanner")
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PackConfig:
     retailer: str
     suburb: str
@@ -40,30 +70,37 @@ class PackConfig:
     store_id: Optional[str] = None
     headers: Optional[Dict[str, str]] = None
     extra: Optional[Dict[str, Any]] = None
+    merged_headers: Dict[str, str] = field(default_factory=dict)
 
     @classmethod
     def from_dict(cls, raw: Dict[str, Any]) -> "PackConfig":
+        source = raw.get("source", "custom")
+        # Build the request headers once at load time instead of per fetch.
+        merged = normalise_headers(raw.get("headers"))
+        spec = FETCHER_SPECS.get(source)
+        if spec and spec.origin:
+            merged.setdefault("Origin", spec.origin)
+            merged.setdefault("Referer", f"{spec.origin}/")
         return cls(
             retailer=raw["retailer"],
             suburb=raw.get("suburb", ""),
             pack_size=int(raw["pack_size"]),
             url=raw.get("url", ""),
-            source=raw.get("source", "custom"),
+            source=source,
             product_id=raw.get("product_id"),
             store_id=raw.get("store_id"),
             headers=raw.get("headers"),
             extra=raw.get("extra"),
+            merged_headers=merged,
         )
 
 
 def load_config() -> Dict[str, Any]:
     if CONFIG_FILE.exists():
-        with CONFIG_FILE.open("r", encoding="utf-8") as fh:
-            return json.load(fh)
+        return orjson.loads(CONFIG_FILE.read_bytes())
     if CONFIG_EXAMPLE_FILE.exists():
         logger.warning("config.json missing; falling back to config.example.json")
-        with CONFIG_EXAMPLE_FILE.open("r", encoding="utf-8") as fh:
-            return json.load(fh)
+        return orjson.loads(CONFIG_EXAMPLE_FILE.read_bytes())
     raise FileNotFoundError(
         "No configuration found. Create scraper/config.json based on config.example.json"
     )
@@ -76,241 +113,412 @@ def normalise_headers(headers: Optional[Dict[str, str]]) -> Dict[str, str]:
     return merged
 
 
-def extract_path(data: Any, dotted_path: Optional[str]) -> Optional[Any]:
-    if not dotted_path:
-        return None
-    current = data
-    for part in dotted_path.split('.'):
-        if current is None:
-            return None
-        if isinstance(current, list):
-            try:
-                idx = int(part)
-            except ValueError:
-                return None
-            if idx >= len(current):
-                return None
-            current = current[idx]
-        elif isinstance(current, dict):
-            current = current.get(part)
-        else:
-            return None
-    return current
+def compile_path(dotted_path: str) -> Callable[[Any], Optional[Any]]:
+    """Generate a straight-line lookup function for a dotted path.
 
+    Rather than looping over prepared steps at call time, build the source
+    for an unrolled function once and exec it, so each lookup runs as a
+    flat sequence of guards and accesses with no per-step dispatch.
+    """
 
-def fetch_dan_murphys(session: requests.Session, pack: PackConfig) -> Dict[str, Any]:
-    if not pack.product_id:
-        raise ValueError("product_id required for Dan Murphy's")
-    store_id = pack.store_id or "DMONLINE"
-    url = (
-        f"https://api.danmurphys.com.au/apis/ui/product/v3/detail/{pack.product_id}?storeId={store_id}"
-    )
-    response = session.get(url, timeout=20)
-    response.raise_for_status()
-    data = response.json()
-
-    price_info: Optional[Dict[str, Any]] = None
-    if isinstance(data, dict):
-        price_info = data.get("Price") or data.get("price")
-        if not price_info and "Products" in data:
-            products = data.get("Products") or data.get("products") or []
-            if isinstance(products, list) and products:
-                price_info = products[0].get("Price") or products[0].get("price")
-
-    if not price_info:
-        raise ValueError("Unable to locate price data for Dan Murphy's response")
-
-    price_total = price_info.get("FinalPrice") or price_info.get("Price") or price_info.get("SalePrice")
-    unit_price = price_info.get("UnitPrice") or price_info.get("CupPrice")
+    lines = ["def _lookup(d):"]
+    for part in dotted_path.split('.'):
+        if part.isdigit():
+            idx = int(part)
+            lines.append(f"    if not isinstance(d, list) or len(d) <= {idx}: return None")
+            lines.append(f"    d = d[{idx}]")
+        else:
+            lines.append("    if not isinstance(d, dict): return None")
+            lines.append(f"    d = d.get({part!r})")
+    lines.append("    return d")
+
+    namespace: Dict[str, Any] = {}
+    exec("\n".join(lines), namespace)
+    return namespace["_lookup"]
+
+
+def load_response_cache() -> None:
+    if not CACHE_FILE.exists():
+        return
+    try:
+        _RESPONSE_CACHE.update(orjson.loads(CACHE_FILE.read_bytes()))
+    except (OSError, ValueError) as exc:
+        logger.warning("Discarding unreadable response cache: %s", exc)
+
+
+def save_response_cache() -> None:
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    CACHE_FILE.write_bytes(orjson.dumps(_RESPONSE_CACHE))
+
+
+def cache_key(method: str, url: str, payload: Optional[Dict[str, Any]] = None) -> str:
+    raw = f"{method} {url}".encode("utf-8")
+    if payload is not None:
+        raw += b" " + orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(raw).hexdigest()
+
+
+async def fetch_json(
+    session: aiohttp.ClientSession, method: str, url: str, **kwargs: Any
+) -> Any:
+    """Issue a request, retrying transient failures with exponential backoff.
+
+    Responses are cached on disk; fresh entries are served without a round
+    trip and stale ones are revalidated so a 304 reuses the cached body.
+    """
+
+    import aiohttp
+
+    key = cache_key(method, url, kwargs.get("json"))
+    cached = _RESPONSE_CACHE.get(key)
+    now = time.time()
+    if cached and now - cached["fetched_at"] < CACHE_TTL:
+        return cached["body"]
+
+    headers = dict(kwargs.pop("headers", None) or {})
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    last_error: Optional[BaseException] = None
+    # Held across retries so backoff also eases pressure on the host.
+    async with _HOST_SEMAPHORES[urlparse(url).netloc]:
+        for attempt in range(RETRY_TOTAL + 1):
+            if attempt:
+                await asyncio.sleep(RETRY_BACKOFF * (2 ** (attempt - 1)))
+            try:
+                async with session.request(method, url, headers=headers, **kwargs) as response:
+                    if response.status in RETRY_STATUSES and attempt < RETRY_TOTAL:
+                        logger.warning("Got %s from %s; retrying", response.status, url)
+                        continue
+                    if response.status == 304 and cached:
+                        cached["fetched_at"] = now
+                        return cached["body"]
+                    response.raise_for_status()
+                    data = orjson.loads(await response.read())
+                    _RESPONSE_CACHE[key] = {
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "fetched_at": now,
+                        "body": data,
+                    }
+                    return data
+            except aiohttp.ClientResponseError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                last_error = exc
+    assert last_error is not None
+    raise last_error
+
+
+@dataclass(slots=True, frozen=True)
+class FetcherSpec:
+    """Everything that distinguishes one retailer API from another.
+
+    Adding a retailer is a table edit: URL builder, candidate price/unit
+    paths, and optional method/payload/origin/credential details.
+    """
+
+    url: Callable[[PackConfig], str]
+    price_paths: Tuple[str, ...]
+    unit_paths: Tuple[str, ...]
+    method: str = "GET"
+    payload: Optional[Callable[[PackConfig], Dict[str, Any]]] = None
+    retry_payload: Optional[Callable[[PackConfig], Dict[str, Any]]] = None
+    root_path: Optional[str] = None
+    root_required: bool = False
+    origin: Optional[str] = None
+    api_key_setting: Optional[str] = None
+    api_key_env: Optional[str] = None
+    api_key_header: Optional[str] = None
+
+
+_LIQUORLAND_QUERY = (
+    "query ProductPricing($id:String!)"
+    "{product(productId:$id){pricing{current} cupPrice}}"
+)
+_LIQUORLAND_QUERY_HASH = hashlib.sha256(_LIQUORLAND_QUERY.encode()).hexdigest()
 
-    if price_total is None:
-        raise ValueError("Dan Murphy's response missing price value")
 
-    if unit_price is None and pack.pack_size:
-        unit_price = float(price_total) / pack.pack_size
+def _liquorland_payload(pack: PackConfig) -> Dict[str, Any]:
+    """Apollo persisted-query form: send only the sha256 of the query."""
 
     return {
-        "price_total": float(price_total),
-        "price_unit": float(unit_price),
-        "checked_at": int(time.time()),
+        "variables": {"id": pack.product_id},
+        "extensions": {
+            "persistedQuery": {"version": 1, "sha256Hash": _LIQUORLAND_QUERY_HASH}
+        },
     }
 
 
-def fetch_bws(session: requests.Session, pack: PackConfig) -> Dict[str, Any]:
-    if not pack.product_id:
-        raise ValueError("product_id required for BWS")
-    headers = normalise_headers(pack.headers)
-    headers.setdefault("Referer", "https://bws.com.au/")
-    headers.setdefault("Origin", "https://bws.com.au")
-
-    url = f"https://bws.com.au/api/products/{pack.product_id}"
-    response = session.get(url, timeout=20, headers=headers)
-    response.raise_for_status()
-    data = response.json()
-
-    price_info = data.get("price") or data.get("Price") or {}
-    price_total = price_info.get("current") or price_info.get("ActualPrice") or data.get("price")
-    unit_price = price_info.get("perItem") or price_info.get("CupPrice")
-
-    if price_total is None:
-        raise ValueError("BWS response missing price")
-
-    if unit_price is None and pack.pack_size:
-        unit_price = float(price_total) / pack.pack_size
-
-    return {
-        "price_total": float(price_total),
-        "price_unit": float(unit_price),
-        "checked_at": int(time.time()),
-    }
-
+def _liquorland_full_payload(pack: PackConfig) -> Dict[str, Any]:
+    """Full query with the hash still attached, so an APQ server registers
+    it and later runs can succeed on the hashed probe alone."""
+
+    payload = _liquorland_payload(pack)
+    payload["query"] = _LIQUORLAND_QUERY
+    return payload
+
+
+def persisted_query_rejected(data: Any) -> bool:
+    """True when the hashed probe failed and the full query should be sent.
+
+    Servers answer PersistedQueryNotFound (hash not registered yet) or
+    PersistedQueryNotSupported (no APQ at all); rather than matching
+    messages, treat any errors-without-data reply to the probe as a
+    rejection — the hashed form carries nothing else the server could run.
+    """
+
+    if not isinstance(data, dict):
+        return False
+    errors = data.get("errors")
+    if not isinstance(errors, list) or not errors:
+        return False
+    return data.get("data") is None
+
+
+FETCHER_SPECS: Dict[str, FetcherSpec] = {
+    "dan_murphys": FetcherSpec(
+        url=lambda p: (
+            "https://api.danmurphys.com.au/apis/ui/product/v3/detail/"
+            f"{p.product_id}?storeId={p.store_id or 'DMONLINE'}"
+        ),
+        price_paths=(
+            "Price.FinalPrice",
+            "Price.Price",
+            "Price.SalePrice",
+            "price.FinalPrice",
+            "price.Price",
+            "price.SalePrice",
+            "Products.0.Price.FinalPrice",
+            "Products.0.Price.Price",
+            "Products.0.Price.SalePrice",
+        ),
+        unit_paths=(
+            "Price.UnitPrice",
+            "Price.CupPrice",
+            "price.UnitPrice",
+            "price.CupPrice",
+            "Products.0.Price.UnitPrice",
+            "Products.0.Price.CupPrice",
+        ),
+    ),
+    "bws": FetcherSpec(
+        url=lambda p: f"https://bws.com.au/api/products/{p.product_id}",
+        price_paths=("price.current", "price.ActualPrice", "Price.current", "Price.ActualPrice", "price"),
+        unit_paths=("price.perItem", "price.CupPrice", "Price.perItem", "Price.CupPrice"),
+        origin="https://bws.com.au",
+    ),
+    "liquorland": FetcherSpec(
+        url=lambda p: "https://api.liquorland.com.au/graphql",
+        method="POST",
+        payload=_liquorland_payload,
+        retry_payload=_liquorland_full_payload,
+        root_path="data.product",
+        root_required=True,
+        price_paths=("pricing.current",),
+        unit_paths=("cupPrice",),
+        origin="https://www.liquorland.com.au",
+    ),
+    "first_choice": FetcherSpec(
+        url=lambda p: "https://api.liquorland.com.au/graphql",
+        method="POST",
+        payload=_liquorland_payload,
+        retry_payload=_liquorland_full_payload,
+        root_path="data.product",
+        root_required=True,
+        price_paths=("pricing.current",),
+        unit_paths=("cupPrice",),
+        origin="https://www.firstchoiceliquor.com.au",
+    ),
+    "coles": FetcherSpec(
+        url=lambda p: f"https://api.coles.com.au/product/v1/productdetail/{p.product_id}",
+        price_paths=("product.price.current", "productPrice.current"),
+        unit_paths=("product.price.unit", "productPrice.unit"),
+        api_key_setting="coles_api_key",
+        api_key_env="COLES_API_KEY",
+        api_key_header="Ocp-Apim-Subscription-Key",
+    ),
+    "woolworths": FetcherSpec(
+        url=lambda p: f"https://www.woolworths.com.au/apis/ui/products/{p.product_id}",
+        root_path="ProductDetail",
+        price_paths=("Price.FinalPrice", "Price.SalePrice", "Price"),
+        unit_paths=("Price.CupPrice",),
+    ),
+}
 
-def fetch_liquorland_like(session: requests.Session, pack: PackConfig) -> Dict[str, Any]:
-    """Liquorland and First Choice share the same API shape."""
 
-    if not pack.product_id:
-        raise ValueError("product_id required for Liquorland/First Choice")
-
-    headers = normalise_headers(pack.headers)
-    origin = "https://www.firstchoiceliquor.com.au" if pack.source == "first_choice" else "https://www.liquorland.com.au"
-    headers.setdefault("Origin", origin)
-    headers.setdefault("Referer", f"{origin}/")
-
-    query = (
-        "query ProductPricing($id: String!) {"
-        " product(productId: $id) {"
-        " pricing { current }"
-        " cupPrice"
-        " }"
-        "}"
+_PATHS: Dict[str, Callable[[Any], Optional[Any]]] = {
+    path: compile_path(path)
+    for spec in FETCHER_SPECS.values()
+    for path in (
+        spec.price_paths + spec.unit_paths + ((spec.root_path,) if spec.root_path else ())
     )
-    payload = {"query": query, "variables": {"id": pack.product_id}}
-
-    response = session.post("https://api.liquorland.com.au/graphql", json=payload, timeout=20, headers=headers)
-    response.raise_for_status()
-    data = response.json()
-
-    product = extract_path(data, "data.product")
-    if not product:
-        raise ValueError("Liquorland API missing product node")
-
-    price_total = extract_path(product, "pricing.current")
-    unit_price = extract_path(product, "cupPrice")
-
-    if price_total is None:
-        raise ValueError("Liquorland API missing price")
-
-    if unit_price is None and pack.pack_size:
-        unit_price = float(price_total) / pack.pack_size
-
-    return {
-        "price_total": float(price_total),
-        "price_unit": float(unit_price),
-        "checked_at": int(time.time()),
-    }
-
-
-def fetch_coles(session: requests.Session, pack: PackConfig, credentials: Dict[str, Any]) -> Dict[str, Any]:
-    api_key = credentials.get("coles_api_key") or os.getenv("COLES_API_KEY")
-    if not api_key:
-        raise ValueError("Coles API key missing. Set COLES_API_KEY env var or config credential")
-    if not pack.product_id:
-        raise ValueError("product_id required for Coles")
-
-    headers = normalise_headers(pack.headers)
-    headers["Ocp-Apim-Subscription-Key"] = api_key
-
-    url = f"https://api.coles.com.au/product/v1/productdetail/{pack.product_id}"
-    response = session.get(url, timeout=20, headers=headers)
-    response.raise_for_status()
-    data = response.json()
-
-    price_total = extract_path(data, "product.price.current") or extract_path(data, "productPrice.current")
-    unit_price = extract_path(data, "product.price.unit") or extract_path(data, "productPrice.unit")
-
-    if price_total is None:
-        raise ValueError("Coles response missing price")
+}
 
-    if unit_price is None and pack.pack_size:
-        unit_price = float(price_total) / pack.pack_size
 
-    return {
-        "price_total": float(price_total),
-        "price_unit": float(unit_price),
-        "checked_at": int(time.time()),
-    }
+def first_numeric(data: Any, paths: Tuple[str, ...]) -> Optional[float]:
+    for path in paths:
+        value = _PATHS[path](data)
+        if value is None:
+            continue
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            continue
+    return None
 
 
-def fetch_woolworths(session: requests.Session, pack: PackConfig) -> Dict[str, Any]:
+async def generic_fetch(
+    session: aiohttp.ClientSession,
+    pack: PackConfig,
+    spec: FetcherSpec,
+    credentials: Dict[str, Any],
+) -> Dict[str, Any]:
     if not pack.product_id:
-        raise ValueError("product_id required for Woolworths")
-
-    headers = normalise_headers(pack.headers)
-    url = f"https://www.woolworths.com.au/apis/ui/products/{pack.product_id}"
-    response = session.get(url, timeout=20, headers=headers)
-    response.raise_for_status()
-    data = response.json()
+        raise ValueError(f"product_id required for {pack.retailer}")
+
+    headers = pack.merged_headers
+    if spec.api_key_header:
+        api_key = credentials.get(spec.api_key_setting) or os.getenv(spec.api_key_env or "")
+        if not api_key:
+            raise ValueError(
+                f"{pack.retailer} API key missing. "
+                f"Set {spec.api_key_env} env var or config credential"
+            )
+        headers = dict(headers)
+        headers[spec.api_key_header] = api_key
 
-    product = extract_path(data, "ProductDetail") or data
-    price_total = extract_path(product, "Price.FinalPrice") or extract_path(product, "Price.SalePrice")
-    unit_price = extract_path(product, "Price.CupPrice")
+    kwargs: Dict[str, Any] = {"headers": headers}
+    if spec.payload is not None:
+        kwargs["json"] = spec.payload(pack)
 
-    if price_total is None and isinstance(product, dict):
-        price_total = product.get("Price")
+    if spec.retry_payload is not None:
+        import aiohttp
 
+        # Some servers reject the hashed probe outright with a 4xx instead
+        # of a GraphQL error body; either way, fall back to the full query.
+        try:
+            data = await fetch_json(session, spec.method, spec.url(pack), **kwargs)
+            rejected = persisted_query_rejected(data)
+        except aiohttp.ClientResponseError as exc:
+            # A terminal 429/5xx already exhausted fetch_json's retries;
+            # piling a full-query POST onto a throttling host would only
+            # make things worse. Only the remaining 4xx mean "no APQ here".
+            if exc.status >= 500 or exc.status in RETRY_STATUSES:
+                raise
+            rejected = True
+        if rejected:
+            # Drop the cached rejection and resend once with the query text.
+            _RESPONSE_CACHE.pop(cache_key(spec.method, spec.url(pack), kwargs.get("json")), None)
+            kwargs["json"] = spec.retry_payload(pack)
+            data = await fetch_json(session, spec.method, spec.url(pack), **kwargs)
+    else:
+        data = await fetch_json(session, spec.method, spec.url(pack), **kwargs)
+
+    if spec.root_path:
+        root = _PATHS[spec.root_path](data)
+        if root is None and spec.root_required:
+            raise ValueError(f"{pack.retailer} response missing product node")
+        if root is not None:
+            data = root
+
+    price_total = first_numeric(data, spec.price_paths)
     if price_total is None:
-        raise ValueError("Woolworths response missing price")
+        raise ValueError(f"{pack.retailer} response missing price")
 
-    if unit_price is None and pack.pack_size:
-        unit_price = float(price_total) / pack.pack_size
+    unit_price = first_numeric(data, spec.unit_paths)
+    if unit_price is None:
+        unit_price = price_total / pack.pack_size if pack.pack_size else price_total
 
     return {
-        "price_total": float(price_total),
-        "price_unit": float(unit_price),
-        "checked_at": int(time.time()),
+        "price_total": price_total,
+        "price_unit": unit_price,
     }
 
 
-FETCHERS = {
-    "dan_murphys": fetch_dan_murphys,
-    "bws": fetch_bws,
-    "liquorland": fetch_liquorland_like,
-    "first_choice": fetch_liquorland_like,
-    "coles": fetch_coles,
-    "woolworths": fetch_woolworths,
-}
-
-
 def load_pack_configs(config: Dict[str, Any]) -> Iterable[PackConfig]:
     packs: List[Dict[str, Any]] = config.get("packs", [])
     for raw in packs:
         yield PackConfig.from_dict(raw)
 
 
-def build_entry(pack: PackConfig, payload: Dict[str, Any]) -> Dict[str, Any]:
+def build_entry(pack: PackConfig, payload: Dict[str, Any], run_ts: int) -> Dict[str, Any]:
     return {
         "retailer": pack.retailer,
         "suburb": pack.suburb,
         "pack_size": pack.pack_size,
-        "price_total": round(payload["price_total"], 2),
-        "price_unit": round(payload["price_unit"], 2),
+        "price_total_cents": int(round(payload["price_total"] * 100)),
+        "price_unit_cents": int(round(payload["price_unit"] * 100)),
         "url": pack.url,
-        "checked_at": payload.get("checked_at", int(time.time())),
+        "checked_at": payload.get("checked_at", run_ts),
     }
 
 
-def write_prices(entries: List[Dict[str, Any]]) -> None:
-    DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
+def prices_unchanged(entries: List[Dict[str, Any]]) -> bool:
+    """True when the new entries match the stored ones, prices-wise.
+
+    checked_at is stripped before comparing — it carries the run timestamp,
+    so including it would make every run look like a change.
+    """
+
+    if not DATA_FILE.exists():
+        return False
+    try:
+        previous = orjson.loads(DATA_FILE.read_bytes()).get("items")
+    except (OSError, ValueError):
+        return False
+    if previous is None:
+        return False
+
+    def strip(items: List[Dict[str, Any]]) -> List[Any]:
+        return [
+            {k: v for k, v in item.items() if k != "checked_at"}
+            if isinstance(item, dict)
+            else item
+            for item in items
+        ]
+
+    return orjson.dumps(strip(previous)) == orjson.dumps(strip(entries))
+
+
+def write_prices(entries: List[Dict[str, Any]]) -> bool:
+    if prices_unchanged(entries):
+        return False
     payload = {
+        "schema_version": 2,
         "updated_at": int(datetime.now(timezone.utc).timestamp()),
         "items": entries,
     }
-    with DATA_FILE.open("w", encoding="utf-8") as fh:
-        json.dump(payload, fh, indent=2)
-        fh.write("\n")
+    tmp = DATA_FILE.with_suffix(".json.tmp")
+    tmp.write_bytes(
+        orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    )
+    os.replace(tmp, DATA_FILE)
+    return True
 
 
-def main() -> int:
+async def fetch_pack(
+    session: aiohttp.ClientSession, pack: PackConfig, credentials: Dict[str, Any], run_ts: int
+) -> Optional[Dict[str, Any]]:
+    spec = FETCHER_SPECS.get(pack.source)
+    if not spec:
+        logger.warning("No fetcher for %s; skipping", pack.source)
+        return None
+    try:
+        logger.info("Fetching %s %sx", pack.retailer, pack.pack_size)
+        payload = await generic_fetch(session, pack, spec, credentials)
+        return build_entry(pack, payload, run_ts)
+    except Exception as exc:  # noqa: BLE001
+        logger.error("Failed to fetch %s %sx: %s", pack.retailer, pack.pack_size, exc)
+        return None
+
+
+async def amain() -> int:
+    import aiohttp
+
     config = load_config()
     credentials = config.get("credentials", {})
     packs = list(load_pack_configs(config))
@@ -318,32 +526,78 @@ def main() -> int:
         logger.error("No packs configured. Add pack definitions to scraper/config.json")
         return 1
 
-    session = requests.Session()
-    session.headers.update({"User-Agent": USER_AGENT})
+    load_response_cache()
+
+    # One timestamp for the whole run; every entry from a run is stamped alike.
+    run_ts = int(time.time())
+
+    # Warm DNS for every retailer host up front so the first request to each
+    # one doesn't pay the lookup on its critical path.
+    hosts = {
+        urlparse(FETCHER_SPECS[pack.source].url(pack)).netloc
+        for pack in packs
+        if pack.source in FETCHER_SPECS
+    }
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        *[loop.getaddrinfo(host, 443) for host in hosts], return_exceptions=True
+    )
+
+    try:
+        resolver = aiohttp.AsyncResolver()
+    except RuntimeError:  # aiodns not installed
+        resolver = None
+
+    # Several packs can hit the same retailer host; cap per-host sockets so
+    # those fetches share a few keep-alive connections instead of opening
+    # one TLS session each.
+    connector = aiohttp.TCPConnector(
+        limit=20,
+        limit_per_host=4,
+        keepalive_timeout=30,
+        resolver=resolver,
+        use_dns_cache=True,
+        ttl_dns_cache=300,
+    )
+    async with aiohttp.ClientSession(
+        connector=connector,
+        headers={"User-Agent": USER_AGENT},
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+    ) as session:
+        results = await asyncio.gather(
+            *[fetch_pack(session, pack, credentials, run_ts) for pack in packs],
+            return_exceptions=True,
+        )
+
+    save_response_cache()
 
     entries: List[Dict[str, Any]] = []
-    for pack in packs:
-        fetcher = FETCHERS.get(pack.source)
-        if not fetcher:
-            logger.warning("No fetcher for %s; skipping", pack.source)
-            continue
-        try:
-            logger.info("Fetching %s %sx", pack.retailer, pack.pack_size)
-            payload = (
-                fetcher(session, pack, credentials) if pack.source == "coles" else fetcher(session, pack)
-            )
-            entries.append(build_entry(pack, payload))
-        except Exception as exc:  # noqa: BLE001
-            logger.error("Failed to fetch %s %sx: %s", pack.retailer, pack.pack_size, exc)
+    for result in results:
+        if isinstance(result, BaseException):
+            logger.error("Fetch task crashed: %s", result)
+        elif result is not None:
+            entries.append(result)
 
     if not entries:
         logger.error("No pricing data collected")
         return 1
 
-    write_prices(entries)
-    logger.info("Wrote %d price rows to %s", len(entries), DATA_FILE)
+    if write_prices(entries):
+        logger.info("Wrote %d price rows to %s", len(entries), DATA_FILE)
+    else:
+        logger.info("Prices unchanged; left %s as is", DATA_FILE)
     return 0
 
 
+def main() -> int:
+    try:
+        import uvloop
+    except ImportError:
+        uvloop = None
+    if uvloop is not None:
+        uvloop.install()
+    return asyncio.run(amain())
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
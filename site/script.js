@@ -57,7 +57,7 @@ function getBestPrice(packSize) {
   if (!priceData || !Array.isArray(priceData.items)) return null;
   const items = priceData.items.filter((item) => Number(item.pack_size) === Number(packSize));
   if (!items.length) return null;
-  items.sort((a, b) => a.price_total - b.price_total);
+  items.sort((a, b) => a.price_total_cents - b.price_total_cents);
   return items[0];
 }
 
@@ -75,8 +75,8 @@ function updatePrice(packSize) {
 
   retailerEl.textContent = result.retailer;
   suburbEl.textContent = result.suburb;
-  priceTotalEl.textContent = formatCurrency(result.price_total);
-  priceUnitEl.textContent = formatCurrency(result.price_unit);
+  priceTotalEl.textContent = formatCurrency(result.price_total_cents / 100);
+  priceUnitEl.textContent = formatCurrency(result.price_unit_cents / 100);
   checkedAtEl.textContent = formatTimestamp(result.checked_at);
   productLink.href = result.url;
   productLink.hidden = !result.url;